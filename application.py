@@ -2,7 +2,7 @@ from datetime import datetime
 from functools import partial
 from typing import Any, Dict, Iterable, List, NamedTuple, Optional
 
-from domain.blog import Blog, BlogRepository
+from domain.blog import Blog, BlogChange, BlogChangeFeed, BlogRepository
 from domain.user import User, UserId, UserRepository
 from utilities.typings import with_kwargs
 
@@ -11,6 +11,8 @@ class BlogHistoryDto(NamedTuple):
     timestamp: datetime
     title: str
     content: str
+    edited_by: Optional[int] = None
+    checkpoint: bool = False
 
 
 class UserDto(NamedTuple):
@@ -27,6 +29,16 @@ class BlogDto(NamedTuple):
     history: Optional[list[BlogHistoryDto]] = None
 
 
+class BlogChangeDto(NamedTuple):
+    cursor: int
+    blog_id: int
+    type: str
+    created_by: int
+    timestamp: datetime
+    title: Optional[str] = None
+    content: Optional[str] = None
+
+
 class BlogDtoAssembler:
     def to_dto(self, blog: Blog, user: User, with_history=False) -> BlogDto:
         kwargs: dict[str, Any] = {
@@ -42,13 +54,28 @@ class BlogDtoAssembler:
 
         return BlogDto(**kwargs)
 
+    def change_to_dto(self, change: BlogChange) -> BlogChangeDto:
+        return BlogChangeDto(
+            cursor=change.cursor,
+            blog_id=change.blog_id.value,
+            type=change.type.value,
+            created_by=change.created_by.value,
+            timestamp=change.timestamp,
+            title=change.title,
+            content=change.content,
+        )
+
 
 class BlogService:
     def __init__(
-        self, blog_repository: BlogRepository, user_repository: UserRepository
+        self,
+        blog_repository: BlogRepository,
+        user_repository: UserRepository,
+        change_feed: BlogChangeFeed,
     ) -> None:
         self.blog_repository = blog_repository
         self.user_repository = user_repository
+        self.change_feed = change_feed
         self.dto_assembler = BlogDtoAssembler()
 
     def create_blog(self, title: str, content: str, created_by: int) -> BlogDto:
@@ -91,3 +118,7 @@ class BlogService:
         blog: Blog = next(iter(search_result))
         user = self.user_repository.find_by_id(blog.created_by)
         return self.dto_assembler.to_dto(blog, user, with_history=True)
+
+    def get_changes(self, since=0, limit=100) -> List[BlogChangeDto]:
+        changes = self.change_feed.find_changes(since=since, limit=limit)
+        return list(map(self.dto_assembler.change_to_dto, changes))
@@ -1,7 +1,9 @@
 import abc
-from dataclasses import dataclass
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Sequence
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+from enum import Enum
+from operator import attrgetter
+from typing import Any, Callable, Dict, List, Optional, Sequence
 
 from domain.user import UserId
 from utilities.domain import Id
@@ -12,7 +14,11 @@ from utilities.typings import fields
 class BlogHistory:
     title: str
     content: str
-    timestamp: datetime = datetime.utcnow()
+    timestamp: datetime = field(default_factory=datetime.utcnow)
+    edited_by: Optional[int] = None
+    checkpoint: bool = False
+
+    __OPTIONAL_FIELDS__ = frozenset({"edited_by", "checkpoint"})
 
     def asdict(self) -> Dict[str, Any]:
         return self.__dict__
@@ -20,9 +26,19 @@ class BlogHistory:
     @classmethod
     def from_dict(cls, props: Dict[str, Any]):
         own_fields = fields(cls)
-        assert own_fields.issubset(set(props.keys()))
+        assert (own_fields - cls.__OPTIONAL_FIELDS__).issubset(set(props.keys()))
         return BlogHistory(**{k: v for k, v in props.items() if k in own_fields})
 
+    @classmethod
+    def from_trusted_dict(cls, props: Dict[str, Any]):
+        return BlogHistory(
+            props["title"],
+            props["content"],
+            props["timestamp"],
+            props.get("edited_by"),
+            bool(props.get("checkpoint")),
+        )
+
 
 class BlogId(Id[int]):
     counter = 0
@@ -62,6 +78,14 @@ class BlogProperties:
         if content:
             self.content = content
 
+    @classmethod
+    def trusted(cls, *, title: str, content: str) -> "BlogProperties":
+        """Build properties validated when they were written, skipping checks."""
+        props = cls.__new__(cls)
+        props.title = title
+        props.content = content
+        return props
+
     def asdict(self) -> Dict[str, Any]:
         return self.__dict__
 
@@ -70,9 +94,19 @@ class BlogProperties:
 
 
 class Blog:
+    """Consecutive edits by the same user within `coalesce_window` overwrite the
+    trailing revision instead of appending one, unless it is a checkpoint."""
+
+    coalesce_window = timedelta(0)
+
     _id: BlogId
     _props: BlogProperties
     _history: List[BlogHistory]
+    _archived_history: Optional[Callable[[], List[Dict[str, Any]]]]
+    _version: int
+    _head_rewritten: bool
+    _replaced_head: Optional[BlogHistory]
+    _pending_count: int
 
     def __init__(
         self,
@@ -81,15 +115,89 @@ class Blog:
         author_id: UserId,
         id: BlogId = BlogId(),
         history: Optional[List[Dict[str, Any]]] = None,
+        archived_history: Optional[Callable[[], List[Dict[str, Any]]]] = None,
     ) -> None:
         props = BlogProperties(title=title, content=content)
+        self._initialize(
+            id=id,
+            props=props,
+            author_id=author_id,
+            history=(
+                list(map(BlogHistory.from_dict, history))
+                if history is not None
+                else [
+                    BlogHistory(
+                        props.title, props.content, edited_by=author_id.value
+                    )
+                ]
+            ),
+            archived_history=archived_history,
+            version=0,
+        )
+
+    @classmethod
+    def restore(
+        cls,
+        title: str,
+        content: str,
+        author_id: UserId,
+        id: BlogId,
+        history: List[Dict[str, Any]],
+        version: int,
+        archived_history: Optional[Callable[[], List[Dict[str, Any]]]] = None,
+    ) -> "Blog":
+        """Rebuild a blog from storage without re-running write-time validation."""
+        blog = cls.__new__(cls)
+        blog._initialize(
+            id=id,
+            props=BlogProperties.trusted(title=title, content=content),
+            author_id=author_id,
+            history=list(map(BlogHistory.from_trusted_dict, history)),
+            archived_history=archived_history,
+            version=version,
+        )
+        return blog
+
+    def _initialize(
+        self,
+        id: BlogId,
+        props: BlogProperties,
+        author_id: UserId,
+        history: List[BlogHistory],
+        archived_history: Optional[Callable[[], List[Dict[str, Any]]]],
+        version: int,
+    ) -> None:
+        """Assign the state shared by new and restored blogs; a blog that was
+        never stored (version 0) has its whole history pending."""
         self._id = id
         self._props = props
         self._author_id = author_id
-        self._history = (
-            list(map(BlogHistory.from_dict, history))
-            if history is not None
-            else [BlogHistory(props.title, props.content)]
+        self._history = history
+        self._archived_history = archived_history
+        self._version = version
+        self._head_rewritten = False
+        self._replaced_head = None
+        self._pending_count = len(history) if version == 0 else 0
+
+    @classmethod
+    def can_coalesce(cls, previous: BlogHistory, entry: BlogHistory) -> bool:
+        return (
+            cls.coalesce_window > timedelta(0)
+            and not previous.checkpoint
+            and previous.edited_by == entry.edited_by
+            and abs(entry.timestamp - previous.timestamp) <= cls.coalesce_window
+        )
+
+    def _load_archived_history(self) -> None:
+        """Merge revisions moved to the archive into the history, on first use."""
+        if self._archived_history is None:
+            return
+        archived = list(
+            map(BlogHistory.from_trusted_dict, self._archived_history())
+        )
+        self._archived_history = None
+        self._history = sorted(
+            [*archived, *self._history], key=attrgetter("timestamp")
         )
 
     @property
@@ -98,6 +206,7 @@ class Blog:
 
     @property
     def history(self) -> List[Dict[str, Any]]:
+        self._load_archived_history()
         return list(map(BlogHistory.asdict, self._history))
 
     @property
@@ -116,15 +225,72 @@ class Blog:
     def created_at(self) -> datetime:
         return next(iter(self._history)).timestamp
 
-    def update(self, properties: BlogProperties) -> None:
+    @property
+    def version(self) -> int:
+        """Stored version the blog was loaded or last saved at, 0 if never stored.
+        Used for optimistic locking."""
+        return self._version
+
+    @property
+    def rewritten_head(self) -> Optional[Dict[str, Any]]:
+        """The stored head revision after being overwritten by coalesced edits."""
+        if not self._head_rewritten:
+            return None
+        return self._history[-self._pending_count - 1].asdict()
+
+    @property
+    def pending_history(self) -> List[Dict[str, Any]]:
+        """Revisions appended since the blog was loaded or last saved."""
+        if self._pending_count == 0:
+            return []
+        return list(map(BlogHistory.asdict, self._history[-self._pending_count :]))
+
+    def update(
+        self, properties: BlogProperties, edited_by: Optional[UserId] = None
+    ) -> None:
         if self._props == properties:
             return
-        history_entry = BlogHistory(properties.title, properties.content)
+        editor = edited_by if edited_by is not None else self._author_id
+        history_entry = BlogHistory(
+            properties.title, properties.content, edited_by=editor.value
+        )
         self._props = properties
+        previous = self._history[-1]
+        # the first revision is never coalesced, it carries created_at
+        if len(self._history) > 1 and self.can_coalesce(previous, history_entry):
+            self._replace_trailing(history_entry)
+            return
         self._history.append(history_entry)
+        self._pending_count += 1
+
+    def checkpoint(self) -> None:
+        """Seal the trailing revision so that the next update appends a new one."""
+        trailing = self._history[-1]
+        if trailing.checkpoint:
+            return
+        self._replace_trailing(replace(trailing, checkpoint=True))
+
+    def _replace_trailing(self, history_entry: BlogHistory) -> None:
+        if self._pending_count == 0 and not self._head_rewritten:
+            self._replaced_head = self._history[-1]
+            self._head_rewritten = True
+        self._history[-1] = history_entry
+
+    def mark_persisted(self, version: int, head_kept: bool = False) -> None:
+        """`head_kept` tells that the stored head was left as it was and the
+        rewritten head was appended after it as a new revision."""
+        if head_kept and self._replaced_head is not None:
+            self._history.insert(
+                len(self._history) - self._pending_count - 1, self._replaced_head
+            )
+        self._version = version
+        self._head_rewritten = False
+        self._replaced_head = None
+        self._pending_count = 0
 
     def __str__(self) -> str:
-        return f"Blog(id={self._id}, props={self._props}, history={self.history})"
+        history = list(map(BlogHistory.asdict, self._history))
+        return f"Blog(id={self._id}, props={self._props}, history={history})"
 
 
 class BlogRepository(abc.ABC):
@@ -145,3 +311,29 @@ class BlogRepository(abc.ABC):
     @abc.abstractmethod
     def find_by(self, **matcher: Dict[str, Any]) -> Sequence[Blog]:
         ...
+
+
+class BlogChangeType(str, Enum):
+    SAVED = "saved"
+    REMOVED = "removed"
+
+
+@dataclass
+class BlogChange:
+    cursor: int
+    blog_id: BlogId
+    type: BlogChangeType
+    created_by: UserId
+    timestamp: datetime
+    title: Optional[str] = None
+    content: Optional[str] = None
+
+
+class BlogChangeFeed(abc.ABC):
+    """Raise RepositoryError if any problem occurs."""
+
+    @abc.abstractmethod
+    def find_changes(self, since: int, limit: int) -> Sequence[BlogChange]:
+        """Return at most `limit` changes with a cursor greater than `since`,
+        oldest first."""
+        ...
@@ -1,2 +1,6 @@
 class RepositoryError(Exception):
     ...
+
+
+class ConcurrencyError(RepositoryError):
+    """The stored aggregate changed since it was loaded."""
@@ -0,0 +1,37 @@
+-- Schema changes for the blog change feed, history archiving and revision
+-- coalescing. Apply once to an existing database (MySQL).
+
+-- created_by keeps the blog author; edited_by is the author of each revision.
+-- Revisions of one blog can be written within the same second, so the
+-- timestamp part of the primary key keeps microseconds.
+ALTER TABLE blog_history
+    MODIFY COLUMN timestamp TIMESTAMP(6) NOT NULL,
+    ADD COLUMN edited_by INTEGER,
+    ADD COLUMN checkpoint BOOL NOT NULL DEFAULT FALSE,
+    ADD COLUMN version INTEGER NOT NULL DEFAULT 1;
+
+UPDATE blog_history SET edited_by = created_by;
+
+CREATE TABLE blog_history_archive (
+    blog_id BIGINT NOT NULL,
+    title VARCHAR(127),
+    content VARCHAR(1024),
+    created_by INTEGER,
+    edited_by INTEGER,
+    timestamp TIMESTAMP(6) NOT NULL,
+    checkpoint BOOL NOT NULL DEFAULT FALSE,
+    PRIMARY KEY (blog_id, timestamp)
+);
+
+CREATE TABLE blog_change (
+    id BIGINT NOT NULL AUTO_INCREMENT,
+    blog_id BIGINT,
+    type VARCHAR(15),
+    title VARCHAR(127),
+    content VARCHAR(1024),
+    created_by INTEGER,
+    timestamp TIMESTAMP NULL,
+    PRIMARY KEY (id)
+);
+
+CREATE INDEX ix_blog_change_blog_id ON blog_change (blog_id);
@@ -1,4 +1,5 @@
 import os
+from datetime import timedelta
 
 import uvicorn
 from dotenv import load_dotenv
@@ -7,18 +8,28 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, sessionmaker
 
 from application import BlogService
+from domain.blog import Blog
 from primary.adapters import BlogRouter
-from secondary.adapters import SQLABlogRepository, SQLAUserRepository
+from secondary.adapters import (
+    SQLABlogChangeFeed,
+    SQLABlogRepository,
+    SQLAUserRepository,
+)
 from utilities.mappers import IdMapper
 
 
 class Module:
     def __init__(self) -> None:
+        Blog.coalesce_window = timedelta(
+            seconds=float(os.environ.get("BLOG_COALESCE_WINDOW_SECONDS", 0))
+        )
         engine = create_engine(os.environ.get("DB_CONNECTION_STR"))
-        db_session: Session = sessionmaker(bind=engine)()
+        session_factory = sessionmaker(bind=engine)
+        db_session: Session = session_factory()
         blog_repository = SQLABlogRepository(db_session)
         user_repository = SQLAUserRepository(db_session)
-        blog_service = BlogService(blog_repository, user_repository)
+        change_feed = SQLABlogChangeFeed(session_factory)
+        blog_service = BlogService(blog_repository, user_repository, change_feed)
         id_mapper = IdMapper()
         blog_router = BlogRouter(blog_service, id_mapper)
         self.app = FastAPI()
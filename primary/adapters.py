@@ -1,12 +1,16 @@
+import asyncio
+import time
 from datetime import datetime
+from functools import partial
 from typing import Generic, Optional, TypeVar
 
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi_class.decorators import get
 from fastapi_class.routable import Routable
 from pydantic import BaseModel
 
-from application import BlogDto, BlogService
+from application import BlogChangeDto, BlogDto, BlogService
 from domain.exceptions import RepositoryError
 from utilities.exceptions import mask
 from utilities.mappers import IdMapper
@@ -37,7 +41,25 @@ class BlogListResponse(CommonModel[BlogResponseModel]):
     next_page: Optional[int]
 
 
+class BlogChangeModel(BaseModel):
+    cursor: int
+    blog_id: str
+    type: str
+    created_by: str
+    timestamp: datetime
+    title: Optional[str]
+    content: Optional[str]
+
+
+class BlogChangeListResponse(CommonModel[BlogChangeModel]):
+    next_cursor: int
+
+
 class BlogRouter(Routable):
+    __MAX_CHANGES_WAIT__ = 30
+    __MAX_CHANGES_LIMIT__ = 500
+    __CHANGES_POLL_INTERVAL__ = 1.0
+
     def __init__(self, blog_service: BlogService, id_mapper: IdMapper) -> None:
         super().__init__()
         self.blog_service = blog_service
@@ -83,3 +105,40 @@ class BlogRouter(Routable):
             data=list(map(self.convert_dto, current_page)),
             next_page=page + 1 if has_next_page else None,
         )
+
+    def convert_change_dto(self, instance: BlogChangeDto) -> BlogChangeModel:
+        return BlogChangeModel(
+            cursor=instance.cursor,
+            blog_id=self.id_mapper.encode(instance.blog_id),
+            type=instance.type,
+            created_by=self.id_mapper.encode(instance.created_by),
+            timestamp=instance.timestamp,
+            title=instance.title,
+            content=instance.content,
+        )
+
+    @get(
+        "/changes",
+        response_model=BlogChangeListResponse,
+        response_model_exclude_none=True,
+    )
+    @mask(
+        from_=RepositoryError,
+        to_=lambda _: HTTPException(
+            500, "Error in database operations, please check server logs."
+        ),
+    )
+    async def read_changes(self, since: int = 0, limit: int = 100, wait: int = 0):
+        """Long-poll for up to `wait` seconds for changes after `since`."""
+        limit = min(max(limit, 1), self.__MAX_CHANGES_LIMIT__)
+        deadline = time.monotonic() + min(max(wait, 0), self.__MAX_CHANGES_WAIT__)
+        get_changes = partial(self.blog_service.get_changes, since=since, limit=limit)
+        changes = await run_in_threadpool(get_changes)
+        while len(changes) == 0 and time.monotonic() < deadline:
+            await asyncio.sleep(self.__CHANGES_POLL_INTERVAL__)
+            changes = await run_in_threadpool(get_changes)
+        return BlogChangeListResponse(
+            success=True,
+            data=list(map(self.convert_change_dto, changes)),
+            next_cursor=changes[-1].cursor if len(changes) > 0 else since,
+        )
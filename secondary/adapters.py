@@ -1,16 +1,39 @@
 from datetime import datetime
 from functools import partial
-from typing import Any, Dict, List, Optional, Sequence
+from operator import itemgetter
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence
 
-from sqlalchemy import BIGINT, INT, TIMESTAMP, Column, String, asc, desc
+from sqlalchemy import (
+    BIGINT,
+    BOOLEAN,
+    INT,
+    TIMESTAMP,
+    Column,
+    String,
+    asc,
+    bindparam,
+    desc,
+    select,
+)
+from sqlalchemy.dialects import mysql
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.declarative import as_declarative, declared_attr
-from sqlalchemy.orm import Query, Session
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql import Select
 
-from domain.blog import Blog, BlogId, BlogRepository
-from domain.exceptions import RepositoryError
+from domain.blog import (
+    Blog,
+    BlogChange,
+    BlogChangeFeed,
+    BlogChangeType,
+    BlogHistory,
+    BlogId,
+    BlogRepository,
+)
+from domain.exceptions import ConcurrencyError, RepositoryError
 from domain.user import User, UserId, UserRepository
 from utilities.db import LazySequence, SupportsPaging
+from utilities.domain import Id
 from utilities.exceptions import mask
 from utilities.strings import ne, wraps_name
 from utilities.typings import properties
@@ -25,22 +48,74 @@ class Base(object):
         return "_".join(tokens)
 
 
+# revisions of one blog can be written within the same second
+PreciseTimestamp = TIMESTAMP().with_variant(mysql.TIMESTAMP(fsp=6), "mysql")
+
+
 class BlogHistoryRecord(Base):
     blog_id = Column("blog_id", BIGINT, primary_key=True)
     title = Column("title", String(127))
     content = Column("content", String(1024))
     created_by = Column("created_by", INT)
+    edited_by = Column("edited_by", INT)
     timestamp = Column(
-        "timestamp", TIMESTAMP, primary_key=True, default=datetime.utcnow()
+        "timestamp", PreciseTimestamp, primary_key=True, default=datetime.utcnow
     )
+    checkpoint = Column("checkpoint", BOOLEAN, nullable=False, default=False)
+    version = Column("version", INT, nullable=False, default=1)
 
     def __init__(
-        self, /, blog_id: int, title: str, content: str, created_by: int
+        self,
+        /,
+        blog_id: int,
+        title: str,
+        content: str,
+        created_by: int,
+        edited_by: Optional[int] = None,
+        timestamp: Optional[datetime] = None,
+        checkpoint: bool = False,
+        version: int = 1,
     ) -> None:
         self.blog_id = blog_id
         self.title = title
         self.content = content
         self.created_by = created_by
+        self.edited_by = edited_by
+        self.timestamp = timestamp
+        self.checkpoint = checkpoint
+        self.version = version
+
+    def dict_without_id(self) -> Dict[str, Any]:
+        return {
+            "title": self.title,
+            "content": self.content,
+            "timestamp": self.timestamp,
+            "created_by": self.created_by,
+            "edited_by": self.edited_by,
+            "checkpoint": self.checkpoint,
+            "version": self.version,
+        }
+
+
+class BlogHistoryArchiveRecord(Base):
+    """Cold revisions moved out of blog_history by the history archiver."""
+
+    blog_id = Column("blog_id", BIGINT, primary_key=True)
+    title = Column("title", String(127))
+    content = Column("content", String(1024))
+    created_by = Column("created_by", INT)
+    edited_by = Column("edited_by", INT)
+    timestamp = Column("timestamp", PreciseTimestamp, primary_key=True)
+    checkpoint = Column("checkpoint", BOOLEAN, nullable=False, default=False)
+
+    def __init__(self, /, record: BlogHistoryRecord) -> None:
+        self.blog_id = record.blog_id
+        self.title = record.title
+        self.content = record.content
+        self.created_by = record.created_by
+        self.edited_by = record.edited_by
+        self.timestamp = record.timestamp
+        self.checkpoint = record.checkpoint
 
     def dict_without_id(self) -> Dict[str, Any]:
         return {
@@ -48,34 +123,180 @@ class BlogHistoryRecord(Base):
             "content": self.content,
             "timestamp": self.timestamp,
             "created_by": self.created_by,
+            "edited_by": self.edited_by,
+            "checkpoint": self.checkpoint,
         }
 
 
+class BlogChangeRecord(Base):
+    """Transactional outbox of blog revisions, written alongside blog_history."""
+
+    id = Column(
+        "id", BIGINT().with_variant(INT, "sqlite"), primary_key=True, autoincrement=True
+    )
+    blog_id = Column("blog_id", BIGINT, index=True)
+    type = Column("type", String(15))
+    title = Column("title", String(127), nullable=True)
+    content = Column("content", String(1024), nullable=True)
+    created_by = Column("created_by", INT)
+    timestamp = Column("timestamp", TIMESTAMP, default=datetime.utcnow)
+
+    def __init__(
+        self,
+        /,
+        blog_id: int,
+        type: BlogChangeType,
+        created_by: int,
+        title: Optional[str] = None,
+        content: Optional[str] = None,
+    ) -> None:
+        self.blog_id = blog_id
+        self.type = type.value
+        self.created_by = created_by
+        self.title = title
+        self.content = content
+
+
 class SQLABlogRepository(BlogRepository, SupportsPaging):
     default_orderings = [
         desc(BlogHistoryRecord.blog_id),
         asc(BlogHistoryRecord.timestamp),
     ]
+    # pages are taken over blog ids, then every row of those blogs is loaded
+    find_statement: Select = (
+        select(BlogHistoryRecord.blog_id)
+        .distinct()
+        .order_by(desc(BlogHistoryRecord.blog_id))
+    )
+    find_by_statements: Dict[FrozenSet[str], Select] = dict()
+    history_statement: Select = (
+        select(BlogHistoryRecord)
+        .where(BlogHistoryRecord.blog_id.in_(bindparam("blog_ids", expanding=True)))
+        .order_by(*default_orderings)
+    )
+    matcher_keys = properties(Blog) - {"version", "rewritten_head", "pending_history"}
 
     def __init__(self, session: Session) -> None:
         self.session = session
         self._page = None
         self._page_size = None
 
+    def to_record(
+        self, blog: Blog, entry: Dict[str, Any], version: int
+    ) -> BlogHistoryRecord:
+        return BlogHistoryRecord(
+            blog_id=blog.id.value,
+            title=entry["title"],
+            content=entry["content"],
+            created_by=blog.created_by.value,
+            edited_by=entry["edited_by"],
+            timestamp=entry["timestamp"],
+            checkpoint=entry["checkpoint"],
+            version=version,
+        )
+
+    def find_head_for_update(self, blog_id: int) -> Optional[BlogHistoryRecord]:
+        query = self.session.query(BlogHistoryRecord)
+        query = query.filter(BlogHistoryRecord.blog_id == blog_id)
+        query = query.order_by(
+            desc(BlogHistoryRecord.version), desc(BlogHistoryRecord.timestamp)
+        )
+        return query.with_for_update().first()
+
+    def can_rewrite(self, head: BlogHistoryRecord, entry: Dict[str, Any]) -> bool:
+        stored = BlogHistory.from_trusted_dict(head.dict_without_id())
+        rewritten = BlogHistory.from_trusted_dict(entry)
+        if (stored.title, stored.content, stored.edited_by) == (
+            rewritten.title,
+            rewritten.content,
+            rewritten.edited_by,
+        ):
+            # only the checkpoint flag changed
+            return True
+        return Blog.can_coalesce(stored, rewritten)
+
+    def claim_head(
+        self, blog: Blog, head: BlogHistoryRecord, values: Dict[str, Any]
+    ) -> None:
+        """Update the stored head only if it is still at the version the blog was
+        loaded with."""
+        filterer = (
+            (BlogHistoryRecord.blog_id == head.blog_id)
+            & (BlogHistoryRecord.timestamp == head.timestamp)
+            & (BlogHistoryRecord.version == blog.version)
+        )
+        query = self.session.query(BlogHistoryRecord).filter(filterer)
+        if query.update(values, synchronize_session=False) != 1:
+            self.session.rollback()
+            raise ConcurrencyError(f"{blog.id} was modified since it was loaded")
+
+    @mask(from_=SQLAlchemyError, to_=RepositoryError)
     def save(self, blog: Blog) -> None:
-        record = BlogHistoryRecord(
+        """Write the revisions added since the blog was loaded.
+
+        Every save moves the blog to the next version with a conditional update
+        of the stored head; ConcurrencyError is raised if another writer moved
+        it first. Coalesced edits overwrite the stored head when the coalescing
+        window still allows it, and are appended as a new revision otherwise.
+        """
+        pending_history = blog.pending_history
+        rewritten_head = blog.rewritten_head
+        if len(pending_history) == 0 and rewritten_head is None:
+            return
+        head = self.find_head_for_update(blog.id.value)
+        stored_version = 0 if head is None else head.version
+        if stored_version != blog.version:
+            self.session.rollback()
+            raise ConcurrencyError(f"{blog.id} was modified since it was loaded")
+        version = blog.version + 1
+        records: List[BlogHistoryRecord] = []
+        head_kept = False
+        if head is not None:
+            values: Dict[str, Any] = {"version": version}
+            if rewritten_head is not None and self.can_rewrite(head, rewritten_head):
+                values.update(
+                    title=rewritten_head["title"],
+                    content=rewritten_head["content"],
+                    timestamp=rewritten_head["timestamp"],
+                    edited_by=rewritten_head["edited_by"],
+                    checkpoint=rewritten_head["checkpoint"],
+                )
+            elif rewritten_head is not None:
+                records.append(self.to_record(blog, rewritten_head, version))
+                head_kept = True
+            self.claim_head(blog, head, values)
+        records.extend(
+            self.to_record(blog, entry, version) for entry in pending_history
+        )
+        latest_revision = (
+            pending_history[-1] if len(pending_history) > 0 else rewritten_head
+        )
+        assert latest_revision is not None
+        editor = latest_revision["edited_by"]
+        change = BlogChangeRecord(
             blog_id=blog.id.value,
+            type=BlogChangeType.SAVED,
+            created_by=editor if editor is not None else blog.created_by.value,
             title=blog.title,
             content=blog.content,
-            created_by=blog.created_by.value,
         )
-        self.session.add(record)
+        self.session.add_all([*records, change])
         self.session.commit()
+        blog.mark_persisted(version, head_kept=head_kept)
 
     def remove(self, blog: Blog):
         filterer = BlogHistoryRecord.blog_id == blog.id.value
         blog_history_items = self.session.query(BlogHistoryRecord)
         blog_history_items.filter(filterer).delete(synchronize_session=False)
+        archive_filterer = BlogHistoryArchiveRecord.blog_id == blog.id.value
+        archived_items = self.session.query(BlogHistoryArchiveRecord)
+        archived_items.filter(archive_filterer).delete(synchronize_session=False)
+        change = BlogChangeRecord(
+            blog_id=blog.id.value,
+            type=BlogChangeType.REMOVED,
+            created_by=blog.created_by.value,
+        )
+        self.session.add(change)
         self.session.commit()
 
     def to_domain(self, blog_history: List[BlogHistoryRecord]) -> List[Blog]:
@@ -89,32 +310,96 @@ class SQLABlogRepository(BlogRepository, SupportsPaging):
             blogs[blog_id].append(blog_history_entry.dict_without_id())
         results: List[Blog] = []
         for blog_id, history in blogs.items():
-            latest_state = history[-1]
-            blog = Blog(
+            head = max(history, key=itemgetter("version", "timestamp"))
+            blog = Blog.restore(
                 id=BlogId(blog_id),
-                title=latest_state["title"],
-                content=latest_state["content"],
-                author_id=UserId(history[0]["created_by"]),
+                title=head["title"],
+                content=head["content"],
+                author_id=UserId(head["created_by"]),
                 history=history,
+                version=head["version"],
+                archived_history=partial(self.find_archived_history, blog_id),
             )
             results.append(blog)
         return results
+
+    @mask(from_=SQLAlchemyError, to_=RepositoryError)
+    def find_archived_history(self, blog_id: int) -> List[Dict[str, Any]]:
+        query = self.session.query(BlogHistoryArchiveRecord)
+        query = query.filter(BlogHistoryArchiveRecord.blog_id == blog_id)
+        query = query.order_by(asc(BlogHistoryArchiveRecord.timestamp))
+        return [record.dict_without_id() for record in query.all()]
     
-    def get_sliced_result(self, slice: slice, query: Query):
-        records = self.to_paging(slice)(query).all()
-        return self.to_domain(records)
+    def get_sliced_result(
+        self,
+        slice: slice,
+        statement: Select,
+        parameters: Optional[Dict[str, Any]] = None,
+    ):
+        statement = self.to_paging(slice)(statement)
+        blog_ids = self.session.execute(statement, parameters).scalars().all()
+        if len(blog_ids) == 0:
+            return []
+        history_parameters = {"blog_ids": blog_ids}
+        records = self.session.execute(self.history_statement, history_parameters)
+        return self.to_domain(records.scalars().all())
+
+    @classmethod
+    def find_by_statement(cls, keys: FrozenSet[str]) -> Select:
+        """Build the statement for a matcher shape once; values are bound later."""
+        if keys not in cls.find_by_statements:
+            criteria = {key: bindparam(key) for key in keys}
+            statement = cls.find_statement.filter_by(**criteria)
+            cls.find_by_statements[keys] = statement
+        return cls.find_by_statements[keys]
 
     @mask(from_=SQLAlchemyError, to_=RepositoryError)
     def find(self) -> Sequence[Blog]:
-        query = self.session.query(BlogHistoryRecord)
-        query = query.order_by(*self.default_orderings)
-        return LazySequence(populator=partial(self.get_sliced_result, query=query))
+        return LazySequence(
+            populator=partial(self.get_sliced_result, statement=self.find_statement)
+        )
 
     def find_by(self, **matcher: Dict[str, Any]) -> Sequence[Blog]:
-        assert set(matcher.keys()).issubset(properties(Blog))
-        query = self.session.query(BlogHistoryRecord).filter_by(**matcher)
-        query = query.order_by(*self.default_orderings)
-        return LazySequence(populator=partial(self.get_sliced_result, query=query))
+        keys = frozenset(matcher.keys())
+        assert keys.issubset(self.matcher_keys)
+        parameters = {
+            key: value.value if isinstance(value, Id) else value
+            for key, value in matcher.items()
+        }
+        return LazySequence(
+            populator=partial(
+                self.get_sliced_result,
+                statement=self.find_by_statement(keys),
+                parameters=parameters,
+            )
+        )
+
+
+class SQLABlogChangeFeed(BlogChangeFeed):
+    """Reads the outbox through short-lived sessions of its own, so polling never
+    touches the transaction of the session shared by the repositories."""
+
+    def __init__(self, session_factory: sessionmaker) -> None:
+        self.session_factory = session_factory
+
+    def to_domain(self, record: BlogChangeRecord) -> BlogChange:
+        return BlogChange(
+            cursor=record.id,
+            blog_id=BlogId(record.blog_id),
+            type=BlogChangeType(record.type),
+            created_by=UserId(record.created_by),
+            timestamp=record.timestamp,
+            title=record.title,
+            content=record.content,
+        )
+
+    @mask(from_=SQLAlchemyError, to_=RepositoryError)
+    def find_changes(self, since: int, limit: int) -> Sequence[BlogChange]:
+        with self.session_factory() as session:
+            query = session.query(BlogChangeRecord)
+            query = query.filter(BlogChangeRecord.id > since)
+            query = query.order_by(asc(BlogChangeRecord.id)).limit(limit)
+            return list(map(self.to_domain, query.all()))
 
 
 class UserRecord(Base):
@@ -0,0 +1,155 @@
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import asc, create_engine, distinct, func, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, sessionmaker
+
+from domain.exceptions import RepositoryError
+from secondary.adapters import BlogHistoryArchiveRecord, BlogHistoryRecord
+from utilities.exceptions import mask
+
+
+@dataclass
+class HistoryRetentionPolicy:
+    """Revisions stay hot if they are among the newest `keep_latest` of a blog or
+    younger than `max_age`. The first revision of a blog is never archived."""
+
+    keep_latest: int = 10
+    max_age: Optional[timedelta] = None
+
+
+class ArchiveProgress(NamedTuple):
+    archived: int
+    blogs: int
+    total_blogs: int
+    batches: int
+
+
+class BlogHistoryArchiver:
+    """Move cold revisions from blog_history to blog_history_archive, walking the
+    blogs in batches of `batch_size` ids with a key cursor on blog_id."""
+
+    def __init__(
+        self,
+        session: Session,
+        policy: HistoryRetentionPolicy,
+        batch_size: int = 100,
+        pause: float = 0.5,
+        on_progress: Optional[Callable[[ArchiveProgress], None]] = None,
+    ) -> None:
+        assert policy.keep_latest >= 1
+        assert batch_size >= 1
+        self.session = session
+        self.policy = policy
+        self.batch_size = batch_size
+        self.pause = pause
+        self.on_progress = on_progress
+
+    @mask(from_=SQLAlchemyError, to_=RepositoryError)
+    def count_blogs(self) -> int:
+        query = self.session.query(func.count(distinct(BlogHistoryRecord.blog_id)))
+        return query.scalar()
+
+    @mask(from_=SQLAlchemyError, to_=RepositoryError)
+    def next_blog_ids(self, after: int) -> List[int]:
+        query = self.session.query(BlogHistoryRecord.blog_id).distinct()
+        query = query.filter(BlogHistoryRecord.blog_id > after)
+        query = query.order_by(asc(BlogHistoryRecord.blog_id)).limit(self.batch_size)
+        return [blog_id for blog_id, in query.all()]
+
+    def cold_revisions(self, timestamps: List[datetime]) -> List[datetime]:
+        """Pick the cold revisions among the timestamps of one blog, oldest first."""
+        cold = timestamps[1 : max(1, len(timestamps) - self.policy.keep_latest)]
+        if self.policy.max_age is not None:
+            cutoff = datetime.utcnow() - self.policy.max_age
+            cold = [timestamp for timestamp in cold if timestamp < cutoff]
+        return cold
+
+    @mask(from_=SQLAlchemyError, to_=RepositoryError)
+    def archive_batch(self, blog_ids: List[int]) -> int:
+        try:
+            query = self.session.query(
+                BlogHistoryRecord.blog_id, BlogHistoryRecord.timestamp
+            )
+            query = query.filter(BlogHistoryRecord.blog_id.in_(blog_ids))
+            query = query.order_by(
+                asc(BlogHistoryRecord.blog_id), asc(BlogHistoryRecord.timestamp)
+            )
+            timestamps: Dict[int, List[datetime]] = {}
+            for blog_id, timestamp in query.all():
+                timestamps.setdefault(blog_id, []).append(timestamp)
+            keys: List[Tuple[int, datetime]] = [
+                (blog_id, timestamp)
+                for blog_id, blog_timestamps in timestamps.items()
+                for timestamp in self.cold_revisions(blog_timestamps)
+            ]
+            if len(keys) == 0:
+                self.session.commit()
+                return 0
+            filterer = tuple_(
+                BlogHistoryRecord.blog_id, BlogHistoryRecord.timestamp
+            ).in_(keys)
+            records = self.session.query(BlogHistoryRecord).filter(filterer)
+            self.session.add_all(map(BlogHistoryArchiveRecord, records.all()))
+            records.delete(synchronize_session=False)
+            self.session.commit()
+            return len(keys)
+        except SQLAlchemyError:
+            self.session.rollback()
+            raise
+
+    def run(self, max_batches: Optional[int] = None) -> ArchiveProgress:
+        progress = ArchiveProgress(
+            archived=0, blogs=0, total_blogs=self.count_blogs(), batches=0
+        )
+        blog_ids = self.next_blog_ids(after=0)
+        while len(blog_ids) > 0:
+            archived = self.archive_batch(blog_ids)
+            progress = ArchiveProgress(
+                archived=progress.archived + archived,
+                blogs=progress.blogs + len(blog_ids),
+                total_blogs=progress.total_blogs,
+                batches=progress.batches + 1,
+            )
+            logging.info(
+                "Archived %d blog revisions, %d/%d blogs processed",
+                progress.archived,
+                progress.blogs,
+                progress.total_blogs,
+            )
+            if self.on_progress is not None:
+                self.on_progress(progress)
+            if max_batches is not None and progress.batches >= max_batches:
+                break
+            blog_ids = self.next_blog_ids(after=blog_ids[-1])
+            if len(blog_ids) > 0:
+                time.sleep(self.pause)
+        return progress
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    engine = create_engine(os.environ.get("DB_CONNECTION_STR"))
+    db_session: Session = sessionmaker(bind=engine)()
+    max_age_days = os.environ.get("HISTORY_MAX_AGE_DAYS")
+    policy = HistoryRetentionPolicy(
+        keep_latest=int(os.environ.get("HISTORY_KEEP_LATEST", 10)),
+        max_age=timedelta(days=int(max_age_days)) if max_age_days else None,
+    )
+    BlogHistoryArchiver(
+        db_session,
+        policy,
+        batch_size=int(os.environ.get("HISTORY_ARCHIVE_BATCH_SIZE", 100)),
+        pause=float(os.environ.get("HISTORY_ARCHIVE_PAUSE_SECONDS", 0.5)),
+    ).run()
+
+
+if __name__ == "__main__":
+    load_dotenv(".env.local")
+    main()
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+from secondary.adapters import (
+    BlogHistoryArchiveRecord,
+    BlogHistoryRecord,
+    SQLABlogRepository,
+)
+from secondary.archive import BlogHistoryArchiver, HistoryRetentionPolicy
+
+START = datetime(2024, 1, 1)
+
+
+def add_revisions(session, blog_id: int, count: int) -> None:
+    session.add_all(
+        BlogHistoryRecord(
+            blog_id=blog_id,
+            title=f"title {index}",
+            content="content",
+            created_by=1,
+            timestamp=START + timedelta(minutes=index),
+        )
+        for index in range(count)
+    )
+    session.commit()
+
+
+def test_archives_all_but_first_and_latest_revisions(session_factory):
+    session = session_factory()
+    for blog_id in range(1, 6):
+        add_revisions(session, blog_id, count=blog_id)
+    reports = []
+    archiver = BlogHistoryArchiver(
+        session,
+        HistoryRetentionPolicy(keep_latest=2),
+        batch_size=2,
+        pause=0,
+        on_progress=reports.append,
+    )
+
+    progress = archiver.run()
+
+    # blogs 4 and 5 keep their first and two latest revisions
+    assert progress.archived == 1 + 2
+    assert (progress.blogs, progress.total_blogs, progress.batches) == (5, 5, 3)
+    assert len(reports) == 3
+    assert session.query(BlogHistoryArchiveRecord).count() == 3
+    assert session.query(BlogHistoryRecord).filter_by(blog_id=5).count() == 3
+
+
+def test_max_age_keeps_recent_revisions(session_factory):
+    session = session_factory()
+    add_revisions(session, 1, count=5)
+    max_age = datetime.utcnow() - START + timedelta(days=1)
+    policy = HistoryRetentionPolicy(keep_latest=1, max_age=max_age)
+
+    assert BlogHistoryArchiver(session, policy, pause=0).run().archived == 0
+    assert session.query(BlogHistoryRecord).count() == 5
+
+
+def test_history_loads_archived_revisions_lazily(session_factory):
+    session = session_factory()
+    add_revisions(session, 1, count=5)
+    BlogHistoryArchiver(session, HistoryRetentionPolicy(keep_latest=1), pause=0).run()
+
+    blog = SQLABlogRepository(session).find()[0:10][0]
+
+    assert blog.title == "title 4"
+    assert [entry["title"] for entry in blog.history] == [
+        f"title {index}" for index in range(5)
+    ]
+
+
+def test_str_does_not_load_archived_history(session_factory):
+    session = session_factory()
+    add_revisions(session, 1, count=5)
+    BlogHistoryArchiver(session, HistoryRetentionPolicy(keep_latest=1), pause=0).run()
+    blog = SQLABlogRepository(session).find()[0:10][0]
+
+    assert "title 1" not in str(blog)
+    assert "title 1" in str(blog.history)
@@ -0,0 +1,200 @@
+from datetime import timedelta
+
+import pytest
+
+from domain.blog import Blog, BlogHistory, BlogId, BlogProperties
+from domain.exceptions import ConcurrencyError
+from domain.user import UserId
+from secondary.adapters import BlogHistoryRecord, SQLABlogRepository
+
+AUTHOR = UserId(1)
+EDITOR = UserId(2)
+
+
+@pytest.fixture(autouse=True)
+def coalesce_window(monkeypatch):
+    monkeypatch.setattr(Blog, "coalesce_window", timedelta(seconds=30))
+
+
+def edit(blog: Blog, title: str, edited_by: UserId = AUTHOR) -> None:
+    blog.update(BlogProperties(title=title, content=f"{title} content"), edited_by)
+
+
+def titles(blog: Blog):
+    return [entry["title"] for entry in blog.history]
+
+
+def load(repository: SQLABlogRepository) -> Blog:
+    return repository.find()[0:10][0]
+
+
+def test_same_author_edits_coalesce():
+    blog = Blog("t", "content", AUTHOR, BlogId(1))
+    edit(blog, "x")
+    edit(blog, "y")
+
+    assert titles(blog) == ["t", "y"]
+
+
+def test_first_revision_is_never_coalesced():
+    blog = Blog("t", "content", AUTHOR, BlogId(1))
+    edit(blog, "x")
+
+    assert titles(blog) == ["t", "x"]
+
+
+def test_different_author_appends():
+    blog = Blog("t", "content", AUTHOR, BlogId(1))
+    edit(blog, "x")
+    edit(blog, "y", edited_by=EDITOR)
+
+    assert titles(blog) == ["t", "x", "y"]
+
+
+def test_checkpoint_seals_trailing_revision():
+    blog = Blog("t", "content", AUTHOR, BlogId(1))
+    edit(blog, "x")
+    blog.checkpoint()
+    edit(blog, "y")
+
+    assert titles(blog) == ["t", "x", "y"]
+    assert [entry["checkpoint"] for entry in blog.history] == [False, True, False]
+
+
+def test_from_dict_accepts_history_without_editor_or_checkpoint():
+    entry = BlogHistory.from_dict({"title": "t", "content": "c", "timestamp": None})
+
+    assert (entry.edited_by, entry.checkpoint) == (None, False)
+
+
+def test_coalesced_edits_overwrite_stored_revision(session_factory):
+    session = session_factory()
+    repository = SQLABlogRepository(session)
+    blog = Blog("t", "content", AUTHOR, BlogId(1))
+    repository.save(blog)
+    edit(blog, "x")
+    repository.save(blog)
+
+    reloaded = load(repository)
+    edit(reloaded, "y")
+    repository.save(reloaded)
+
+    assert titles(load(repository)) == ["t", "y"]
+    assert session.query(BlogHistoryRecord).count() == 2
+
+
+def test_checkpoint_is_persisted(session_factory):
+    repository = SQLABlogRepository(session_factory())
+    blog = Blog("t", "content", AUTHOR, BlogId(1))
+    edit(blog, "x")
+    repository.save(blog)
+    blog.checkpoint()
+    repository.save(blog)
+
+    reloaded = load(repository)
+    edit(reloaded, "y")
+    repository.save(reloaded)
+
+    assert titles(load(repository)) == ["t", "x", "y"]
+
+
+def test_same_blog_can_be_saved_repeatedly(session_factory):
+    repository = SQLABlogRepository(session_factory())
+    blog = Blog("t", "content", AUTHOR, BlogId(1))
+    repository.save(blog)
+    for title in ["x", "y", "z"]:
+        edit(blog, title)
+        repository.save(blog)
+
+    assert titles(load(repository)) == ["t", "z"]
+    assert load(repository).version == 4
+
+
+def test_stale_write_is_rejected(session_factory):
+    repository = SQLABlogRepository(session_factory())
+    repository.save(Blog("t", "content", AUTHOR, BlogId(1)))
+    first, second = load(repository), load(repository)
+
+    edit(first, "x")
+    repository.save(first)
+    edit(second, "y")
+
+    with pytest.raises(ConcurrencyError):
+        repository.save(second)
+    assert titles(load(repository)) == ["t", "x"]
+
+
+def test_stale_coalesced_write_is_rejected(session_factory):
+    repository = SQLABlogRepository(session_factory())
+    blog = Blog("t", "content", AUTHOR, BlogId(1))
+    edit(blog, "x")
+    repository.save(blog)
+    first, second = load(repository), load(repository)
+
+    edit(first, "y")
+    repository.save(first)
+    edit(second, "z")
+
+    with pytest.raises(ConcurrencyError):
+        repository.save(second)
+    assert titles(load(repository)) == ["t", "y"]
+
+
+def test_refused_rewrite_keeps_replaced_revision(session_factory, monkeypatch):
+    repository = SQLABlogRepository(session_factory())
+    blog = Blog("q", "content", AUTHOR, BlogId(1))
+    edit(blog, "r1")
+    repository.save(blog)
+    edit(blog, "r2")
+    monkeypatch.setattr(Blog, "coalesce_window", timedelta(0))
+    repository.save(blog)
+
+    assert titles(blog) == ["q", "r1", "r2"]
+    assert titles(load(repository)) == ["q", "r1", "r2"]
+    edit(blog, "r3")
+    repository.save(blog)
+    assert titles(load(repository)) == ["q", "r1", "r2", "r3"]
+
+
+def test_find_by_author_loads_whole_blogs(session_factory):
+    repository = SQLABlogRepository(session_factory())
+    blog = Blog("t", "content", AUTHOR, BlogId(1))
+    repository.save(blog)
+    edit(blog, "x", edited_by=EDITOR)
+    repository.save(blog)
+
+    found = repository.find_by(created_by=AUTHOR)[0:10]
+
+    assert [(b.title, b.version, b.created_by.value) for b in found] == [
+        ("x", 2, AUTHOR.value)
+    ]
+    assert titles(found[0]) == ["t", "x"]
+    assert len(repository.find_by(created_by=EDITOR)[0:10]) == 0
+
+
+def test_pages_contain_whole_blogs(session_factory):
+    repository = SQLABlogRepository(session_factory())
+    for blog_id in (1, 2):
+        blog = Blog("t", "content", AUTHOR, BlogId(blog_id))
+        for title in ["x", "y", "z"]:
+            edit(blog, title, edited_by=UserId(10 + len(blog.history)))
+        repository.save(blog)
+        edit(blog, "w", edited_by=EDITOR)
+        repository.save(blog)
+
+    first_page = repository.find()[0:1]
+    second_page = repository.find()[1:2]
+
+    assert [b.id.value for b in first_page] == [2]
+    assert [b.id.value for b in second_page] == [1]
+    assert (second_page[0].title, second_page[0].version) == ("w", 2)
+    assert titles(second_page[0]) == ["t", "x", "y", "z", "w"]
+
+
+def test_find_by_rejects_persistence_accessors(session_factory):
+    repository = SQLABlogRepository(session_factory())
+
+    with pytest.raises(AssertionError):
+        repository.find_by(version=1)
+    with pytest.raises(AssertionError):
+        repository.find_by(pending_history=[])
@@ -0,0 +1,69 @@
+import time
+
+import pytest
+from fastapi import FastAPI
+
+try:
+    from fastapi.testclient import TestClient
+
+    from primary.adapters import BlogRouter
+except (ImportError, ValueError):  # fastapi-class 1.1.2 does not load on 3.11+
+    pytest.skip("the pinned web stack is not importable", allow_module_level=True)
+
+from application import BlogService
+from domain.blog import Blog, BlogId
+from domain.user import UserId
+from secondary.adapters import (
+    SQLABlogChangeFeed,
+    SQLABlogRepository,
+    SQLAUserRepository,
+)
+from utilities.mappers import IdMapper
+
+
+@pytest.fixture
+def client(session_factory, monkeypatch):
+    monkeypatch.setenv("SECRET", "secret")
+    monkeypatch.setattr(BlogRouter, "__CHANGES_POLL_INTERVAL__", 0.05)
+    session = session_factory()
+    repository = SQLABlogRepository(session)
+    for blog_id in range(1, 4):
+        repository.save(Blog("title", "content", UserId(1), BlogId(blog_id)))
+    blog_service = BlogService(
+        repository, SQLAUserRepository(session), SQLABlogChangeFeed(session_factory)
+    )
+    app = FastAPI()
+    app.include_router(BlogRouter(blog_service, IdMapper()).router, prefix="/blogs")
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("limit, expected", [(0, 1), (-5, 1), (2, 2), (10_000, 3)])
+def test_limit_is_clamped(client, monkeypatch, limit, expected):
+    monkeypatch.setattr(BlogRouter, "__MAX_CHANGES_LIMIT__", 3)
+    response = client.get("/blogs/changes", params={"limit": limit})
+
+    assert response.status_code == 200
+    assert len(response.json()["data"]) == expected
+
+
+def test_next_cursor_follows_last_change(client):
+    body = client.get("/blogs/changes", params={"limit": 2}).json()
+
+    assert body["next_cursor"] == body["data"][-1]["cursor"]
+    rest = client.get("/blogs/changes", params={"since": body["next_cursor"]})
+    assert len(rest.json()["data"]) == 1
+
+
+def test_next_cursor_is_kept_when_nothing_is_returned(client):
+    body = client.get("/blogs/changes", params={"since": 99}).json()
+
+    assert body == {"success": True, "data": [], "next_cursor": 99}
+
+
+def test_wait_ends_at_the_deadline(client):
+    started = time.monotonic()
+    body = client.get("/blogs/changes", params={"since": 99, "wait": 1}).json()
+    elapsed = time.monotonic() - started
+
+    assert body["data"] == []
+    assert 1 <= elapsed < 2
@@ -0,0 +1,59 @@
+from domain.blog import Blog, BlogChangeType, BlogId, BlogProperties
+from domain.user import UserId
+from secondary.adapters import (
+    BlogChangeRecord,
+    SQLABlogChangeFeed,
+    SQLABlogRepository,
+)
+
+
+def test_save_and_remove_are_written_to_the_feed(session_factory):
+    repository = SQLABlogRepository(session_factory())
+    feed = SQLABlogChangeFeed(session_factory)
+    blog = Blog("title", "content", UserId(1), BlogId(1))
+
+    repository.save(blog)
+    repository.remove(blog)
+
+    changes = feed.find_changes(since=0, limit=10)
+    assert [change.type for change in changes] == [
+        BlogChangeType.SAVED,
+        BlogChangeType.REMOVED,
+    ]
+    assert changes[0].title == "title"
+    next_changes = feed.find_changes(since=changes[0].cursor, limit=10)
+    assert [change.cursor for change in next_changes] == [changes[1].cursor]
+
+
+def test_polling_does_not_commit_the_shared_session(session_factory):
+    session = session_factory()
+    feed = SQLABlogChangeFeed(session_factory)
+    session.add(BlogChangeRecord(blog_id=1, type=BlogChangeType.SAVED, created_by=1))
+
+    assert feed.find_changes(since=0, limit=10) == []
+    assert len(session.new) == 1
+    session.rollback()
+    assert feed.find_changes(since=0, limit=10) == []
+
+
+def test_saved_change_is_credited_to_the_editor(session_factory):
+    repository = SQLABlogRepository(session_factory())
+    feed = SQLABlogChangeFeed(session_factory)
+    blog = Blog("title", "content", UserId(1), BlogId(1))
+    repository.save(blog)
+    blog.update(BlogProperties(title="edited", content="content"), UserId(2))
+    repository.save(blog)
+
+    changes = feed.find_changes(since=0, limit=10)
+    assert [change.created_by.value for change in changes] == [1, 2]
+
+
+def test_save_without_changes_writes_nothing(session_factory):
+    repository = SQLABlogRepository(session_factory())
+    feed = SQLABlogChangeFeed(session_factory)
+    blog = Blog("title", "content", UserId(1), BlogId(1))
+    repository.save(blog)
+    repository.save(blog)
+
+    assert len(feed.find_changes(since=0, limit=10)) == 1
+    assert blog.version == 1
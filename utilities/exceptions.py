@@ -1,3 +1,4 @@
+import inspect
 import logging
 import traceback
 from functools import wraps
@@ -11,6 +12,19 @@ Target = Union[Type[AnyException], Callable[[], AnyException]]
 
 def mask(from_: Type[Source], to_: Target):
     def inner(callable: Callable[..., T]):
+        if inspect.iscoroutinefunction(callable):
+
+            @wraps(callable)
+            async def handle_inner_async(*args, **kwargs):
+                try:
+                    return await callable(*args, **kwargs)
+                except from_ as e:
+                    logging.error(e)
+                    traceback.print_exc()
+                    raise to_(e)
+
+            return handle_inner_async
+
         @wraps(callable)
         def handle_inner(*args, **kwargs):
             try:
@@ -1,27 +1,43 @@
 import dataclasses
-from typing import Any, Callable, List, Set, TypeVar
+from functools import wraps
+from typing import Any, Callable, Dict, FrozenSet, List, TypeVar
 
 T = TypeVar("T")
 
 
-def own_properties(cls: type) -> Set[str]:
-    return {
+def cached_per_type(callable: Callable[[type], T]) -> Callable[[type], T]:
+    cache: Dict[type, T] = dict()
+
+    @wraps(callable)
+    def call(cls: type) -> T:
+        if cls not in cache:
+            cache[cls] = callable(cls)
+        return cache[cls]
+
+    return call
+
+
+@cached_per_type
+def own_properties(cls: type) -> FrozenSet[str]:
+    return frozenset(
         key
         for key, value in cls.__dict__.items()
         if isinstance(value, property)
-    }
+    )
 
 
-def fields(cls: type) -> Set[str]:
-    return {field.name for field in dataclasses.fields(cls)}
+@cached_per_type
+def fields(cls: type) -> FrozenSet[str]:
+    return frozenset(field.name for field in dataclasses.fields(cls))
 
 
-def properties(cls: type) -> Set[str]:
+@cached_per_type
+def properties(cls: type) -> FrozenSet[str]:
     props: List[str] = []
     for kls in cls.mro():
         props += own_properties(kls)
 
-    return set(props)
+    return frozenset(props)
 
 
 def with_kwargs(callable: Callable[..., T]):